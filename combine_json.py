@@ -1,47 +1,61 @@
-import json
 import os
+from concurrent.futures import ThreadPoolExecutor
+import orjson
+
+def load_character_file(path):
+    """read one character JSON file, returning (sequences, error)"""
+    try:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read()), None
+    except Exception as e:
+        return None, e
+
 
 def combine_character_data(data_dir="imu_dataset", output_file="combined_dataset.json"):
     """
     Combine individual character JSON files into a single dataset with metadata.
+    Each entry in "data" holds one character with its sequences and their
+    lengths as parallel lists.
     """
     combined_data = {
         "data": [],
         "metadata": {
             "num_samples": 0,
-            "characters": set(),
+            "characters": [],
             "samples_per_character": {}
         }
     }
 
-    for filename in os.listdir(data_dir):
-        if filename.endswith(".json"):
-            character = filename[:-5]  # strip extension
-            file_path = os.path.join(data_dir, filename)
+    files = sorted(
+        (entry.name, entry.path) for entry in os.scandir(data_dir)
+        if entry.is_file() and entry.name.endswith(".json")
+    )
 
-            try:
-                with open(file_path, "r") as f:
-                    sequences = json.load(f)
+    # read and parse the files in parallel, then merge them in order
+    with ThreadPoolExecutor() as executor:
+        results = executor.map(load_character_file, [path for _, path in files])
 
-                for seq in sequences:
-                    combined_data["data"].append({
-                        "character": character,
-                        "sequence": seq,
-                        "sequence_length": len(seq)
-                    })
+        for (filename, _), (sequences, error) in zip(files, results):
+            if error is not None:
+                print(f"Error reading {filename}: {error}")
+                continue
+
+            character = filename[:-5]  # strip extension
+            combined_data["data"].append({
+                "character": character,
+                "sequences": sequences,
+                "lengths": [len(seq) for seq in sequences]
+            })
 
-                combined_data["metadata"]["characters"].add(character)
-                combined_data["metadata"]["samples_per_character"][character] = len(sequences)
-                combined_data["metadata"]["num_samples"] += len(sequences)
+            combined_data["metadata"]["samples_per_character"][character] = len(sequences)
+            combined_data["metadata"]["num_samples"] += len(sequences)
 
-                print(f"{character}: {len(sequences)} samples")
-            except Exception as e:
-                print(f"Error reading {filename}: {e}")
+            print(f"{character}: {len(sequences)} samples")
 
-    combined_data["metadata"]["characters"] = sorted(combined_data["metadata"]["characters"])
+    combined_data["metadata"]["characters"] = sorted(combined_data["metadata"]["samples_per_character"])
 
-    with open(output_file, "w") as f:
-        json.dump(combined_data, f, indent=2)
+    with open(output_file, "wb") as f:
+        f.write(orjson.dumps(combined_data))
 
     print(f"\nSaved combined dataset → {output_file}")
     print(f"Total samples: {combined_data['metadata']['num_samples']}")
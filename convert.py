@@ -0,0 +1,54 @@
+import numpy as np
+import tensorflow as tf
+
+def convert_to_tflite(model_path="best_model.keras", data_file="data.npz", output_file="model.tflite",
+                      quantization="int8", num_calibration_samples=100):
+    """
+    Convert the trained Keras model to TFLite for single-sample inference.
+    quantization="int8" applies post-training quantization calibrated on
+    real normalized training sequences from data.npz (see to_npy.py),
+    "float16" stores weights as FP16.
+    The model input stays float32 in both cases.
+    """
+    model = tf.keras.models.load_model(model_path)
+    with np.load(data_file) as data:
+        X = data["X_train"].astype(np.float32)
+        max_length = int(data["max_length"])
+
+    # fix batch=1 and the sequence length so the interpreter gets static shapes;
+    # an unbounded time axis gets the length the training data was padded to
+    max_timesteps = model.input_shape[1] or max_length
+    num_features = X.shape[2]
+    infer = tf.function(lambda x: model(x, training=False))
+    concrete = infer.get_concrete_function(tf.TensorSpec([1, max_timesteps, num_features], tf.float32))
+
+    converter = tf.lite.TFLiteConverter.from_concrete_functions([concrete], model)
+    converter.optimizations = [tf.lite.Optimize.DEFAULT]
+
+    if quantization == "int8":
+        def representative_dataset():
+            for seq in X[:num_calibration_samples]:
+                sample = np.zeros((1, max_timesteps, num_features), dtype=np.float32)
+                n = min(len(seq), max_timesteps)
+                sample[0, :n] = seq[:n]
+                yield [sample]
+
+        converter.representative_dataset = representative_dataset
+    elif quantization == "float16":
+        converter.target_spec.supported_types = [tf.float16]
+    else:
+        raise ValueError(f"Unknown quantization: {quantization}")
+
+    tflite_model = converter.convert()
+    with open(output_file, "wb") as f:
+        f.write(tflite_model)
+
+    print(f"Saved {quantization} TFLite model → {output_file}")
+    print(f"Input shape: (1, {max_timesteps}, {num_features})")
+    print(f"Size: {len(tflite_model) / 1024:.1f} KiB")
+
+    return output_file
+
+
+if __name__ == "__main__":
+    convert_to_tflite()
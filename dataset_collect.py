@@ -9,8 +9,8 @@ data is saved in JSON files per character.
 import serial
 import os
 import json
-import numpy as np
-from scipy.signal import butter, filtfilt
+
+from fast_preprocess import IMUPreprocessor, SampleBuffer, parse_sample, read_lines
 
 
 class IMUDataCollector:
@@ -18,6 +18,11 @@ class IMUDataCollector:
         # connect to the IMU device
         self.serial = serial.Serial(port, baud_rate)
 
+        # incoming rows are parsed straight into the sample buffer
+        self.preprocessor = IMUPreprocessor()
+        self.samples = SampleBuffer()
+        self._rx = bytearray()
+
         self.dataset = {}
         self.initial_samples = {}
         self.data_dir = 'imu_dataset'
@@ -28,55 +33,6 @@ class IMUDataCollector:
         # load any previous data if available
         self.load_existing_dataset()
 
-        # filter configuration
-        self.filter_order = 2
-        self.cutoff_freq = 20
-        self.sampling_rate = 100
-
-    def butter_lowpass(self):
-        """design a low-pass Butterworth filter"""
-        nyquist = 0.5 * self.sampling_rate
-        norm_cutoff = self.cutoff_freq / nyquist
-        return butter(self.filter_order, norm_cutoff, btype='low')
-
-    def apply_lowpass_filter(self, data):
-        """apply filter to each sensor axis"""
-        b, a = self.butter_lowpass()
-        arr = np.array(data)
-        filtered = np.zeros_like(arr)
-
-        for i in range(arr.shape[1]):
-            filtered[:, i] = filtfilt(b, a, arr[:, i])
-
-        return filtered.tolist()
-
-    def calculate_relative_motion(self, data):
-        """
-        subtract IMU2 from IMU1 and return
-        concatenated [imu1, imu2, relative]
-        """
-        arr = np.array(data)
-        imu1, imu2 = arr[:, :6], arr[:, 6:]
-        rel = imu1 - imu2
-        return np.concatenate([imu1, imu2, rel], axis=1).tolist()
-
-    def normalize_data(self, data):
-        """normalize each axis (zero mean, unit variance)"""
-        arr = np.array(data)
-        mean, std = np.mean(arr, axis=0), np.std(arr, axis=0)
-        std = np.where(std == 0, 1, std)
-        return ((arr - mean) / std).tolist()
-
-    def preprocess_sequence(self, sequence):
-        """filter -> relative motion -> normalize"""
-        if not sequence:
-            return None
-        return self.normalize_data(
-            self.calculate_relative_motion(
-                self.apply_lowpass_filter(sequence)
-            )
-        )
-
     def load_existing_dataset(self):
         """load dataset from json files if they exist"""
         self.dataset, self.initial_samples = {}, {}
@@ -134,23 +90,23 @@ class IMUDataCollector:
 
     def collect_single_sample(self):
         """record one sequence between START and END markers"""
-        seq, recording = [], False
+        recording = False
 
         while True:
-            if self.serial.in_waiting:
-                line = self.serial.readline().decode('utf-8').strip()
-
-                if line == "START":
-                    recording, seq = True, []
-                elif line == "END":
-                    return self.preprocess_sequence(seq) if recording and seq else None
+            for line in read_lines(self.serial, self._rx):
+                if line == b"START":
+                    recording = True
+                    self.samples.clear()
+                elif line == b"END":
+                    if not (recording and len(self.samples)):
+                        return None
+                    processed = self.preprocessor.preprocess_sequence(self.samples.values())
+                    # stored as JSON, so convert back to lists only here
+                    return processed.tolist() if processed is not None else None
                 elif recording:
-                    try:
-                        data = [float(x) for x in line.split(',')]
-                        if len(data) == 12:
-                            seq.append(data)
-                    except ValueError:
-                        continue
+                    data = parse_sample(line)
+                    if data is not None:
+                        self.samples.append(data)
 
     def save_dataset(self):
         for char, sequences in self.dataset.items():
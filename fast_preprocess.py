@@ -0,0 +1,240 @@
+"""
+Shared IMU preprocessing
+
+Everything the collector and both predictors do between the serial port
+and the model: splitting and parsing IMU lines, buffering a recording,
+the filter -> relative motion -> normalize pipeline and padding the model
+input. The pipeline runs as a single numba-compiled kernel when numba is
+installed and falls back to the scipy/numpy path otherwise; both produce
+the same features.
+"""
+
+import numpy as np
+from scipy.signal import butter, sosfiltfilt, sosfilt_zi
+
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+except ImportError:
+    NUMBA_AVAILABLE = False
+
+# initial capacity of a SampleBuffer and of the feature work buffer,
+# doubled/reallocated whenever a recording runs longer
+SAMPLE_BUFFER_CAPACITY = 500
+
+NUM_AXES = 12
+NUM_FEATURES = 18
+
+
+def filter_state(sos):
+    """
+    initial-state template and edge padding used by sosfiltfilt
+    for the given second-order sections
+    """
+    ntaps = 2 * len(sos) + 1
+    ntaps -= min((sos[:, 2] == 0).sum(), (sos[:, 5] == 0).sum())
+    return sosfilt_zi(sos), 3 * int(ntaps)
+
+
+def _sosfilt_inplace(sos, zi, x, reverse):
+    """direct-form II transposed cascade over x, started at steady state"""
+    n_sections = sos.shape[0]
+    state = np.empty((n_sections, 2))
+    first = x[-1] if reverse else x[0]
+    for s in range(n_sections):
+        state[s, 0] = zi[s, 0] * first
+        state[s, 1] = zi[s, 1] * first
+
+    n = x.shape[0]
+    for k in range(n):
+        t = n - 1 - k if reverse else k
+        v = x[t]
+        for s in range(n_sections):
+            y = sos[s, 0] * v + state[s, 0]
+            state[s, 0] = sos[s, 1] * v - sos[s, 4] * y + state[s, 1]
+            state[s, 1] = sos[s, 2] * v - sos[s, 5] * y
+            v = y
+        x[t] = v
+
+
+def _relative_normalize(out):
+    """fill out[:, 12:] with IMU1 - IMU2, then normalize every column in place"""
+    T = out.shape[0]
+    for t in range(T):
+        for c in range(6):
+            out[t, 12 + c] = out[t, c] - out[t, 6 + c]
+
+    # one-pass (Welford) mean/std per column
+    for c in range(out.shape[1]):
+        mean, m2 = 0.0, 0.0
+        for t in range(T):
+            d = out[t, c] - mean
+            mean += d / (t + 1)
+            m2 += d * (out[t, c] - mean)
+        std = np.sqrt(m2 / T)
+        if std == 0:
+            std = 1.0
+        for t in range(T):
+            out[t, c] = (out[t, c] - mean) / std
+
+
+def _preprocess(seq, sos, zi, padlen):
+    T, n_axes = seq.shape
+    out = np.empty((T, n_axes + 6), dtype=np.float32)
+    ext = np.empty(T + 2 * padlen)
+
+    # zero-phase low-pass per axis, with the same odd extension as sosfiltfilt
+    for c in range(n_axes):
+        x0, xl = seq[0, c], seq[T - 1, c]
+        for k in range(padlen):
+            ext[k] = 2 * x0 - seq[padlen - k, c]
+            ext[padlen + T + k] = 2 * xl - seq[T - 2 - k, c]
+        for t in range(T):
+            ext[padlen + t] = seq[t, c]
+
+        _sosfilt_inplace(sos, zi, ext, False)
+        _sosfilt_inplace(sos, zi, ext, True)
+
+        for t in range(T):
+            out[t, c] = ext[padlen + t]
+
+    _relative_normalize(out)
+    return out
+
+
+if NUMBA_AVAILABLE:
+    _sosfilt_inplace = njit(cache=True, fastmath=True)(_sosfilt_inplace)
+    _relative_normalize = njit(cache=True, fastmath=True)(_relative_normalize)
+    _preprocess = njit(cache=True, fastmath=True)(_preprocess)
+
+
+def preprocess_njit(seq, sos, zi, padlen):
+    """
+    filter -> relative motion -> normalize for a (T, 12) float32 sequence,
+    T must be longer than padlen (as for sosfiltfilt)
+    """
+    return _preprocess(seq, sos, zi, padlen)
+
+
+def split_lines(rx):
+    """yield each complete line in the bytearray rx and drop it from rx"""
+    while True:
+        end = rx.find(b"\n")
+        if end < 0:
+            return
+        line = bytes(rx[:end]).strip()
+        del rx[:end + 1]
+        yield line
+
+
+def read_lines(port, rx):
+    """read everything waiting on a serial port into rx and yield the complete lines"""
+    waiting = port.in_waiting
+    if waiting:
+        rx += port.read(waiting)
+    yield from split_lines(rx)
+
+
+def parse_sample(line):
+    """parse one comma-separated IMU line, None unless it holds exactly NUM_AXES values"""
+    # float() rejects empty and malformed fields, so truncated lines fail
+    # the same way on every numpy version; the list is copied straight
+    # into a SampleBuffer row
+    try:
+        vals = [float(x) for x in line.split(b",")]
+    except ValueError:
+        return None
+    return vals if len(vals) == NUM_AXES else None
+
+
+def pad_sequence(model_input, seq):
+    """
+    copy seq into the preallocated (1, T, NUM_FEATURES) model input,
+    truncating to T and zeroing only the rows after it
+    """
+    n = min(len(seq), model_input.shape[1])
+    model_input[0, :n] = seq[:n]
+    model_input[0, n:] = 0
+    return model_input
+
+
+class SampleBuffer:
+    """growable (T, NUM_AXES) float32 buffer that a recording is written into"""
+
+    def __init__(self, capacity=SAMPLE_BUFFER_CAPACITY):
+        self._buf = np.empty((capacity, NUM_AXES), dtype=np.float32)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def clear(self):
+        self._n = 0
+
+    def append(self, vals):
+        if self._n == len(self._buf):
+            self._buf = np.concatenate([self._buf, np.empty_like(self._buf)])
+        self._buf[self._n] = vals
+        self._n += 1
+
+    def values(self):
+        return self._buf[:self._n]
+
+
+class IMUPreprocessor:
+    """filter -> relative motion -> normalize for one recorded sequence"""
+
+    def __init__(self, filter_order=2, cutoff_freq=20, sampling_rate=100):
+        self.filter_order = filter_order
+        self.cutoff_freq = cutoff_freq  # Hz
+        self.sampling_rate = sampling_rate  # Hz
+
+        # the low-pass design only depends on these constants, so build the
+        # second-order sections (and sosfiltfilt's start state) once
+        nyquist = 0.5 * self.sampling_rate
+        self.sos = butter(self.filter_order, self.cutoff_freq / nyquist, btype="low", output="sos").astype(np.float32)
+        self.zi, self.padlen = filter_state(self.sos)
+
+        self._work = np.empty((SAMPLE_BUFFER_CAPACITY, NUM_FEATURES), dtype=np.float32)
+
+    def warmup(self):
+        """compile the numba kernel now rather than on the first recording"""
+        if NUMBA_AVAILABLE:
+            preprocess_njit(np.zeros((self.padlen + 1, NUM_AXES), dtype=np.float32), self.sos, self.zi, self.padlen)
+
+    def apply_lowpass_filter(self, seq):
+        """zero-phase low-pass on all sensor axes at once"""
+        return sosfiltfilt(self.sos, seq, axis=0)
+
+    def calculate_relative_motion(self, arr):
+        """
+        subtract IMU2 from IMU1 and return [imu1, imu2, relative],
+        written column-wise into the reused (T, 18) work buffer
+        (the result is only valid until the next call)
+        """
+        if len(arr) > len(self._work):
+            self._work = np.empty((len(arr), NUM_FEATURES), dtype=np.float32)
+        out = self._work[:len(arr)]
+        out[:, :NUM_AXES] = arr
+        np.subtract(arr[:, :6], arr[:, 6:], out=out[:, NUM_AXES:])
+        return out
+
+    def normalize_data(self, arr):
+        """normalize each axis in place (zero mean, unit variance)"""
+        arr -= arr.mean(axis=0)
+        # centred in place, so the variance is the column-wise mean of x^2
+        std = np.sqrt(np.einsum("ij,ij->j", arr, arr) / len(arr))
+        std[std == 0] = 1
+        arr /= std
+        return arr
+
+    def preprocess_sequence(self, seq):
+        """
+        filter -> relative motion -> normalize for a raw (T, 12) recording,
+        None if it is too short for the zero-phase filter's edge padding
+        """
+        if len(seq) <= self.padlen:
+            return None
+        if NUMBA_AVAILABLE:
+            return preprocess_njit(seq, self.sos, self.zi, self.padlen)
+        return self.normalize_data(self.calculate_relative_motion(self.apply_lowpass_filter(seq)))
@@ -1,81 +1,63 @@
 import serial
 import numpy as np
-from scipy.signal import butter, filtfilt
 import tensorflow as tf
 
+from fast_preprocess import (
+    NUM_FEATURES, IMUPreprocessor, SampleBuffer, pad_sequence, parse_sample, read_lines
+)
+
 class IMUPredictor:
     def __init__(self, model_path, label_encoder_path, port="COM6", baud_rate=115200):
-        """Load model, labels, and set up serial connection."""
-        self.model = tf.keras.models.load_model(model_path)
+        """Load TFLite model (see convert.py), labels, and set up serial connection."""
+        self.interpreter = tf.lite.Interpreter(model_path=model_path, num_threads=2)
+        self.interpreter.allocate_tensors()
+        input_details = self.interpreter.get_input_details()[0]
+        self._input_index = input_details["index"]
+        self._output_index = self.interpreter.get_output_details()[0]["index"]
         self.label_encoder = np.load(label_encoder_path, allow_pickle=True)
-        self.serial = serial.Serial(port, baud_rate)
-
-        self.filter_order = 2
-        self.cutoff_freq = 20  # Hz
-        self.sampling_rate = 100  # Hz
-
-    def butter_lowpass(self):
-        nyquist = 0.5 * self.sampling_rate
-        cutoff = self.cutoff_freq / nyquist
-        return butter(self.filter_order, cutoff, btype="low", analog=False)
 
-    def apply_lowpass_filter(self, data):
-        b, a = self.butter_lowpass()
-        arr = np.array(data)
-        filtered = np.zeros_like(arr)
-        for i in range(arr.shape[1]):
-            filtered[:, i] = filtfilt(b, a, arr[:, i])
-        return filtered.tolist()
+        # every sequence is zero-padded/truncated to the model's fixed input
+        # length, the same post-padding to_npy.py applies for training
+        self.max_timesteps = int(input_details["shape"][1])
+        self._in = np.zeros((1, self.max_timesteps, NUM_FEATURES), dtype=np.float32)
 
-    def calculate_relative_motion(self, data):
-        arr = np.array(data)
-        imu1, imu2 = arr[:, :6], arr[:, 6:]
-        rel = imu1 - imu2
-        return np.concatenate([imu1, imu2, rel], axis=1).tolist()
-
-    def normalize_data(self, data):
-        arr = np.array(data)
-        mean, std = np.mean(arr, axis=0), np.std(arr, axis=0)
-        std = np.where(std == 0, 1, std)
-        return (arr - mean) / std
+        self.serial = serial.Serial(port, baud_rate)
 
-    def preprocess_sequence(self, seq):
-        if not seq:
-            return None
-        seq = self.apply_lowpass_filter(seq)
-        seq = self.calculate_relative_motion(seq)
-        return self.normalize_data(seq)
+        self.preprocessor = IMUPreprocessor()
+        self.preprocessor.warmup()
+        self.samples = SampleBuffer()
+        self._rx = bytearray()
 
     def collect_and_predict(self):
-        sequence, recording = [], False
+        recording = False
         print("Ready to predict. Write a character...")
 
         while True:
-            if self.serial.in_waiting:
-                line = self.serial.readline().decode("utf-8").strip()
-
-                if line == "START":
-                    recording, sequence = True, []
+            for line in read_lines(self.serial, self._rx):
+                if line == b"START":
+                    recording = True
+                    self.samples.clear()
                     print("Recording started...")
-                elif line == "END":
-                    if recording and sequence:
+                elif line == b"END":
+                    if recording and len(self.samples):
                         print("Recording ended. Processing...")
-                        seq = self.preprocess_sequence(sequence)
+                        seq = self.preprocessor.preprocess_sequence(self.samples.values())
                         if seq is not None:
-                            model_input = np.expand_dims(seq, axis=0)
-                            pred = self.model.predict(model_input, verbose=0)[0]
+                            model_input = pad_sequence(self._in, seq)
+                            self.interpreter.set_tensor(self._input_index, model_input)
+                            self.interpreter.invoke()
+                            pred = self.interpreter.get_tensor(self._output_index)[0]
                             idx, conf = np.argmax(pred), pred[np.argmax(pred)]
                             char = self.label_encoder[idx]
                             print(f"\nPredicted: {char.lower()}  (conf: {conf:.2f})")
                             print("Ready for next character...")
+                        else:
+                            print("Recording too short, write the character again...")
                     recording = False
                 elif recording:
-                    try:
-                        vals = [float(x) for x in line.split(",")]
-                        if len(vals) == 12:
-                            sequence.append(vals)
-                    except ValueError:
-                        continue
+                    vals = parse_sample(line)
+                    if vals is not None:
+                        self.samples.append(vals)
 
     def run(self):
         print("IMU Predictor Started")
@@ -90,7 +72,7 @@ class IMUPredictor:
 
 
 def main():
-    MODEL_PATH = "best_model.keras"
+    MODEL_PATH = "model.tflite"
     LABEL_ENCODER_PATH = "label_encoder.npy"
     predictor = IMUPredictor(MODEL_PATH, LABEL_ENCODER_PATH)
     predictor.run()
@@ -1,21 +1,55 @@
-import serial
+import asyncio
+import serial_asyncio
 import numpy as np
-from scipy.signal import butter, filtfilt
 import tensorflow as tf
 import tkinter as tk
 from tkinter import filedialog
 from threading import Thread
+from collections import deque
+
+from fast_preprocess import (
+    NUM_FEATURES, IMUPreprocessor, SampleBuffer, pad_sequence, parse_sample, split_lines
+)
+
+# how often pending predictions are written to the text widget
+FLUSH_INTERVAL_MS = 50
+
+
+class SerialLineProtocol(asyncio.Protocol):
+    """Accumulate bytes from the serial port and emit one callback per raw line"""
+
+    def __init__(self, on_line):
+        self.on_line = on_line
+        self._rx = bytearray()
+
+    def data_received(self, data):
+        self._rx += data
+        for line in split_lines(self._rx):
+            self.on_line(line)
+
 
 class IMUPredictorGUI:
-    def __init__(self, model_path, label_encoder_path, port='COM6', baud_rate=115200):
+    def __init__(self, model_path, label_encoder_path, data_path="data.npz", port='COM6', baud_rate=115200):
         """GUI for real-time IMU character prediction"""
         self.model = tf.keras.models.load_model(model_path)
         self.label_encoder = np.load(label_encoder_path, allow_pickle=True)
-        self.serial = serial.Serial(port, baud_rate)
 
-        self.filter_order = 2
-        self.cutoff_freq = 20
-        self.sampling_rate = 100
+        # every sequence is zero-padded/truncated to the model's input length,
+        # or to the length to_npy.py padded the training data to if the model
+        # leaves it open, so inference is traced once for a static shape
+        self.max_timesteps = self.model.input_shape[1]
+        if self.max_timesteps is None:
+            with np.load(data_path) as data:
+                self.max_timesteps = int(data["max_length"])
+        self._infer = tf.function(
+            lambda x: self.model(x, training=False), jit_compile=True
+        ).get_concrete_function(tf.TensorSpec([1, self.max_timesteps, NUM_FEATURES], tf.float32))
+        self._in = np.zeros((1, self.max_timesteps, NUM_FEATURES), dtype=np.float32)
+
+        self.preprocessor = IMUPreprocessor()
+        self.preprocessor.warmup()
+        self.samples = SampleBuffer()
+        self._recording = False
 
         self.root = tk.Tk()
         self.root.title("IMU Character Predictor")
@@ -40,49 +74,34 @@ class IMUPredictorGUI:
         save_button = tk.Button(button_frame, text="Save", font=("Helvetica", 20), command=self.save_text)
         save_button.pack(side=tk.RIGHT, padx=20)
 
-        self.running = True
-        self.thread = Thread(target=self.collect_and_predict)
+        # predictions arrive on the serial thread and are written to the
+        # text widget in batches from the Tk thread; set up before the port
+        # opens so a line arriving straight away has somewhere to go
+        self._pending = deque()
+        self.root.after(FLUSH_INTERVAL_MS, self.flush_predictions)
+
+        # serial I/O runs on an asyncio loop in a background thread; lines
+        # are delivered by SerialLineProtocol as the bytes arrive
+        self.loop = asyncio.new_event_loop()
+        self.thread = Thread(target=self.loop.run_forever, daemon=True)
         self.thread.start()
+        self.transport = asyncio.run_coroutine_threadsafe(
+            self.open_serial(port, baud_rate), self.loop
+        ).result()
 
         self.root.protocol("WM_DELETE_WINDOW", self.on_close)
 
-    def butter_lowpass(self):
-        nyquist = 0.5 * self.sampling_rate
-        cutoff = self.cutoff_freq / nyquist
-        return butter(self.filter_order, cutoff, btype="low")
-
-    def apply_lowpass_filter(self, data):
-        b, a = self.butter_lowpass()
-        data_array = np.array(data)
-        filtered = np.zeros_like(data_array)
-        for i in range(data_array.shape[1]):
-            filtered[:, i] = filtfilt(b, a, data_array[:, i])
-        return filtered.tolist()
-
-    def calculate_relative_motion(self, data):
-        arr = np.array(data)
-        imu1, imu2 = arr[:, :6], arr[:, 6:]
-        rel = imu1 - imu2
-        return np.concatenate([imu1, imu2, rel], axis=1).tolist()
-
-    def normalize_data(self, data):
-        arr = np.array(data)
-        mean, std = np.mean(arr, axis=0), np.std(arr, axis=0)
-        std = np.where(std == 0, 1, std)
-        return (arr - mean) / std
-
-    def preprocess_sequence(self, sequence):
-        if not sequence:
-            return None
-        filtered = self.apply_lowpass_filter(sequence)
-        rel_motion = self.calculate_relative_motion(filtered)
-        return self.normalize_data(rel_motion)
-
     def append_prediction(self, text):
         self.text_display.config(state=tk.NORMAL)
         self.text_display.insert(tk.END, text)
         self.text_display.config(state=tk.DISABLED)
 
+    def flush_predictions(self):
+        if self._pending:
+            chars = [self._pending.popleft() for _ in range(len(self._pending))]
+            self.append_prediction("".join(chars))
+        self.root.after(FLUSH_INTERVAL_MS, self.flush_predictions)
+
     def clear_text(self):
         self.text_display.config(state=tk.NORMAL)
         self.text_display.delete(1.0, tk.END)
@@ -96,34 +115,35 @@ class IMUPredictorGUI:
                 with open(path, "w") as f:
                     f.write(text)
 
-    def collect_and_predict(self):
-        sequence, recording = [], False
-        while self.running:
-            if self.serial.in_waiting:
-                line = self.serial.readline().decode("utf-8").strip()
-                if line == "START":
-                    recording, sequence = True, []
-                elif line == "END":
-                    if recording and sequence:
-                        processed = self.preprocess_sequence(sequence)
-                        if processed is not None:
-                            model_input = np.expand_dims(processed, axis=0)
-                            pred = self.model.predict(model_input, verbose=0)
-                            idx = np.argmax(pred[0])
-                            char = self.label_encoder[idx]
-                            self.root.after(0, self.append_prediction, char.lower())
-                    recording = False
-                elif recording:
-                    try:
-                        values = [float(x) for x in line.split(",")]
-                        if len(values) == 12:
-                            sequence.append(values)
-                    except ValueError:
-                        continue
+    async def open_serial(self, port, baud_rate):
+        transport, _ = await serial_asyncio.create_serial_connection(
+            self.loop, lambda: SerialLineProtocol(self.handle_line), port, baudrate=baud_rate
+        )
+        return transport
+
+    def handle_line(self, line):
+        if line == b"START":
+            self._recording = True
+            self.samples.clear()
+        elif line == b"END":
+            if self._recording and len(self.samples):
+                processed = self.preprocessor.preprocess_sequence(self.samples.values())
+                if processed is not None:
+                    model_input = pad_sequence(self._in, processed)
+                    # concrete functions only accept tensors, not ndarrays
+                    pred = self._infer(tf.constant(model_input))[0].numpy()
+                    idx = np.argmax(pred)
+                    char = self.label_encoder[idx]
+                    self._pending.append(char.lower())
+            self._recording = False
+        elif self._recording:
+            values = parse_sample(line)
+            if values is not None:
+                self.samples.append(values)
 
     def on_close(self):
-        self.running = False
-        self.serial.close()
+        self.loop.call_soon_threadsafe(self.transport.close)
+        self.loop.call_soon_threadsafe(self.loop.stop)
         self.root.destroy()
 
     def run(self):
@@ -133,7 +153,8 @@ class IMUPredictorGUI:
 def main():
     MODEL_PATH = "best_model.keras"
     LABEL_ENCODER_PATH = "label_encoder.npy"
-    app = IMUPredictorGUI(MODEL_PATH, LABEL_ENCODER_PATH)
+    DATA_PATH = "data.npz"
+    app = IMUPredictorGUI(MODEL_PATH, LABEL_ENCODER_PATH, DATA_PATH)
     app.run()
 
 
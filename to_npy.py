@@ -1,58 +1,80 @@
-import json
 import numpy as np
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
+import orjson
+
+def stratified_split(y, test_size=0.2, random_state=42):
+    """
+    Shuffle the indices of each class and take the first test_size share
+    of every class for the test set. Returns (train_idx, test_idx).
+    """
+    rng = np.random.default_rng(random_state)
+    train_idx, test_idx = [], []
+    for c in np.unique(y):
+        idx = np.flatnonzero(y == c)
+        rng.shuffle(idx)
+        n_test = int(round(len(idx) * test_size))
+        test_idx.append(idx[:n_test])
+        train_idx.append(idx[n_test:])
+
+    # mix the classes so neither split is ordered by label
+    return rng.permutation(np.concatenate(train_idx)), rng.permutation(np.concatenate(test_idx))
+
 
 def prepare_training_data(json_file="combined_dataset.json", test_size=0.2, random_state=42, save_dir="./"):
     """
     Load IMU dataset from JSON, pad sequences, encode labels,
-    split into train/test sets, and save to .npy files.
+    split into train/test sets, and save them to one compressed data.npz
+    (arrays X_train, X_test, y_train, y_test, classes, and max_length, the
+    padded sequence length the predictors pad to as well). Load with
+    np.load("data.npz"), which reads each array lazily on first access.
+    label_encoder.npy is still written for the predictors.
     """
-    with open(json_file, "r") as f:
-        dataset = json.load(f)
+    with open(json_file, "rb") as f:
+        dataset = orjson.loads(f.read())
 
     sequences, labels = [], []
-    for sample in dataset["data"]:
-        sequences.append(sample["sequence"])
-        labels.append(sample["character"])
+    for record in dataset["data"]:
+        sequences.extend(record["sequences"])
+        labels.extend([record["character"]] * len(record["sequences"]))
 
     max_length = max(len(seq) for seq in sequences)
+    num_features = len(sequences[0][0])
 
-    X = []
-    for seq in sequences:
-        padded = seq + [[0.0] * len(seq[0])] * (max_length - len(seq))
-        X.append(padded)
-    X = np.array(X)
+    # zero-padded at the end, filled in place one sequence at a time
+    X = np.zeros((len(sequences), max_length, num_features), dtype=np.float32)
+    for i, seq in enumerate(sequences):
+        X[i, :len(seq)] = seq
 
-    label_encoder = LabelEncoder()
-    y = label_encoder.fit_transform(labels)
+    # sorted class names and integer labels, as LabelEncoder would give
+    classes, y = np.unique(labels, return_inverse=True)
 
-    X_train, X_test, y_train, y_test = train_test_split(
-        X, y, test_size=test_size, random_state=random_state, stratify=y
-    )
+    train_idx, test_idx = stratified_split(y, test_size, random_state)
+    X_train, X_test = X[train_idx], X[test_idx]
+    y_train, y_test = y[train_idx], y[test_idx]
 
-    np.save(f"{save_dir}/X_train.npy", X_train)
-    np.save(f"{save_dir}/X_test.npy", X_test)
-    np.save(f"{save_dir}/y_train.npy", y_train)
-    np.save(f"{save_dir}/y_test.npy", y_test)
-    np.save(f"{save_dir}/label_encoder.npy", label_encoder.classes_)
+    np.savez_compressed(
+        f"{save_dir}/data.npz",
+        X_train=X_train, X_test=X_test, y_train=y_train, y_test=y_test,
+        classes=classes, max_length=max_length
+    )
+    np.save(f"{save_dir}/label_encoder.npy", classes)
 
     print("\nDataset Info")
     print(f"Features per timestep: {X.shape[2]}")
     print(f"Max sequence length: {max_length}")
-    print(f"Classes: {label_encoder.classes_}")
+    print(f"Classes: {classes}")
 
     print("\nShapes")
     print(f"X_train: {X_train.shape}, X_test: {X_test.shape}")
     print(f"y_train: {y_train.shape}, y_test: {y_test.shape}")
 
     print("\nClass distribution")
-    for idx, label in enumerate(label_encoder.classes_):
-        train_count = np.sum(y_train == idx)
-        test_count = np.sum(y_test == idx)
-        print(f"{label}: train={train_count}, test={test_count}")
+    num_classes = len(classes)
+    train_counts = np.bincount(y_train, minlength=num_classes)
+    test_counts = np.bincount(y_test, minlength=num_classes)
+    for idx, label in enumerate(classes):
+        print(f"{label}: train={train_counts[idx]}, test={test_counts[idx]}")
 
-    return X_train, X_test, y_train, y_test, label_encoder
+    return X_train, X_test, y_train, y_test, classes
 
 
 if __name__ == "__main__":